@@ -195,6 +195,7 @@ class ActionEngine:
 
         from io import BytesIO
         from PIL import Image
+        from lavague.core.utilities.web_utils import resize_screenshot
 
         next_engine = self.engines[next_engine_name]
 
@@ -202,19 +203,11 @@ class ActionEngine:
             yield from next_engine.execute_instruction_gradio(instruction, self)
         else:
             ret = next_engine.execute_instruction(instruction)
+            self._invalidate_navigation_nodes(next_engine_name)
             self.ret = ret
             self.navigation_engine.url_input = self.driver.get_url()
-            img = self.driver.get_screenshot_as_png()
-            img = BytesIO(img)
-            img = Image.open(img)
-            if self.screenshot_ratio != 1:
-                img = img.resize(
-                    (
-                        int(img.width / self.screenshot_ratio),
-                        int(img.height / self.screenshot_ratio),
-                    )
-                )
-            self.image_display = img
+            img = Image.open(BytesIO(self.driver.get_screenshot_as_png()))
+            self.image_display = resize_screenshot(img, self.screenshot_ratio)
             yield (
                 self.navigation_engine.objective,
                 self.navigation_engine.url_input,
@@ -239,7 +232,16 @@ class ActionEngine:
         """
 
         next_engine = self.engines[next_engine_name]
-        return next_engine.execute_instruction(instruction)
+        ret = next_engine.execute_instruction(instruction)
+        self._invalidate_navigation_nodes(next_engine_name)
+        return ret
+
+    def _invalidate_navigation_nodes(self, engine_name: str):
+        """Other engines may scroll the page, making the nodes retrieved by the Navigation Engine stale"""
+        if engine_name != "Navigation Engine" and isinstance(
+            self.navigation_engine, NavigationEngine
+        ):
+            self.navigation_engine.invalidate_nodes_cache()
 
     def get_llm_name(self):
         return get_model_name(self.python_engine.llm)
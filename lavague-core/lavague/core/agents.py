@@ -21,6 +21,7 @@ from PIL import Image
 from IPython.display import display, HTML, Code
 from lavague.core.token_counter import TokenCounter
 from lavague.core.utilities.config import is_flag_true
+from lavague.core.utilities.web_utils import resize_screenshot
 
 from lavague.core.utilities.profiling import (
     ChartGenerator,
@@ -330,17 +331,8 @@ class WebAgent:
         )
 
     def _get_screenshot(self, screenshot_ratio):
-        img = self.driver.get_screenshot_as_png()
-        img = BytesIO(img)
-        img = Image.open(img)
-        if screenshot_ratio != 1:
-            img = img.resize(
-                (
-                    int(img.width / screenshot_ratio),
-                    int(img.height / screenshot_ratio),
-                )
-            )
-        return img
+        img = Image.open(BytesIO(self.driver.get_screenshot_as_png()))
+        return resize_screenshot(img, screenshot_ratio)
 
     def _run_step_gradio(
         self,
@@ -560,13 +552,16 @@ class WebAgent:
             steps = len(dflogs) if steps > len(dflogs) else steps
             for step in range(steps):
                 print(f"Step: {step}")
-                sub_ins = 0
-                if isinstance(dflogs.at[step, "engine_log"], list):
-                    for subinst in dflogs.at[step, "engine_log"]:
-                        print(f"Sub-Instruction: {sub_ins}")
-                        sub_ins += 1
+                engine_log = dflogs.at[step, "engine_log"]
+                if isinstance(engine_log, dict):
+                    engine_log = [engine_log]
+                if isinstance(engine_log, list):
+                    # Logs of previous versions had a list of sub-instructions
+                    for sub_ins, subinst in enumerate(engine_log):
+                        if len(engine_log) > 1:
+                            print(f"Sub-Instruction: {sub_ins}")
                         x = 0
-                        for node in subinst["retrieved_html"]:
+                        for node in subinst.get("retrieved_html", []):
                             print(f"Node {x}")
                             x = x + 1
                             display(HTML(node))  # Display node as visual element
@@ -589,13 +584,16 @@ class WebAgent:
             steps = len(dflogs)
             for step in range(steps):
                 print(f"Step: {step}")
-                sub_ins = 0
-                if isinstance(dflogs.at[step, "engine_log"], list):
-                    for subinst in dflogs.at[step, "engine_log"]:
-                        print(f"Sub-Instruction: {sub_ins}")
-                        sub_ins += 1
+                engine_log = dflogs.at[step, "engine_log"]
+                if isinstance(engine_log, dict):
+                    engine_log = [engine_log]
+                if isinstance(engine_log, list):
+                    # Logs of previous versions had a list of sub-instructions
+                    for sub_ins, subinst in enumerate(engine_log):
+                        if len(engine_log) > 1:
+                            print(f"Sub-Instruction: {sub_ins}")
                         x = 0
-                        for node in subinst["retrieved_html"]:
+                        for node in subinst.get("retrieved_html", []):
                             print(f"Node: {x}")
                             x = x + 1
                             display(HTML(node))  # Display node as visual element
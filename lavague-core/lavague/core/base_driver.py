@@ -11,6 +11,7 @@ from lavague.core.utilities.format_utils import (
 from enum import Enum
 from datetime import datetime
 import hashlib
+import threading
 
 
 class InteractionType(Enum):
@@ -26,6 +27,28 @@ r_get_xpaths_from_html = r'xpath=["\'](.*?)["\']'
 
 
 class BaseDriver(ABC):
+    # Whether the browser can only be driven from the thread that created the driver
+    thread_bound = False
+
+    @property
+    def command_lock(self) -> threading.RLock:
+        """
+        Lock shared by everything sending commands to this driver. Browsers do not support
+        concurrent commands, code calling the driver from several threads holds it around each call.
+        It is reentrant, so that a driver method holding it can call other driver methods.
+        """
+        lock = self.__dict__.get("_command_lock")
+        if lock is None:
+            # setdefault is atomic, concurrent first calls get the same lock
+            lock = self.__dict__.setdefault("_command_lock", threading.RLock())
+        return lock
+
+    def __getstate__(self):
+        # Locks cannot be copied or pickled, copies get their own one
+        state = self.__dict__.copy()
+        state.pop("_command_lock", None)
+        return state
+
     def __init__(self, url: Optional[str], init_function: Optional[Callable[[], Any]]):
         """Init the driver with the init funtion, and then go to the desired url"""
         self.init_function = (
@@ -233,6 +256,13 @@ class BaseDriver(ABC):
         """Prompt to explain the llm which style of code he should output and which variables and imports he should expect"""
         pass
 
+    def get_cached_capability(self) -> str:
+        """Same as `get_capability`, computed only once per driver"""
+        capability = getattr(self, "_capability", None)
+        if capability is None:
+            capability = self._capability = self.get_capability()
+        return capability
+
     def get_obs(self) -> dict:
         """Get the current observation of the driver"""
         current_screenshot_folder = self.get_current_screenshot_folder()
@@ -0,0 +1,393 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from llama_index.core.base.llms.base import BaseLLM
+from llama_index.core.embeddings import BaseEmbedding
+from lavague.core.extractors import JsonFromMarkdownExtractor, extract_xpaths_from_html
+
+PLAN_ADAPTATION_PROMPT = """
+An action was previously generated for the instruction: {template_instruction}
+Its typed values were replaced by placeholders, here are the values they had: {values}
+
+New instruction: {instruction}
+If the new instruction targets the same elements as the previous one, give the values of the placeholders for it.
+Answer only with a JSON object in a json markdown block, with the key "applicable" set to true or false, and one key per placeholder.
+"""
+
+# Typed values of an action, quoted or not, after the `value:` key
+ACTION_VALUE_PATTERN = re.compile(r"^([ \t]*value:[ \t]*)(.*?)[ \t]*$", re.MULTILINE)
+
+STOPWORDS = {
+    "a",
+    "an",
+    "and",
+    "at",
+    "by",
+    "for",
+    "from",
+    "in",
+    "into",
+    "it",
+    "of",
+    "on",
+    "or",
+    "the",
+    "then",
+    "to",
+    "with",
+}
+
+
+class ResponseCache:
+    """
+    In-memory LRU cache mapping exact prompts to their LLM responses.
+    Prompts are hashed so the cache does not keep the full prompt strings alive.
+
+    Args:
+        maxsize (`int`):
+            Maximum number of entries kept in the cache, 0 disables it
+        ttl (`Optional[float]`):
+            Time to live of an entry in seconds, entries never expire if None
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[str, Tuple[Any, float]] = OrderedDict()
+
+    def _to_key(self, prompt: str) -> str:
+        return hashlib.blake2b(prompt.encode("utf-8")).hexdigest()
+
+    def get(self, prompt: str) -> Optional[Any]:
+        key = self._to_key(prompt)
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, timestamp = entry
+        if self.ttl is not None and time.monotonic() - timestamp > self.ttl:
+            del self._entries[key]
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, prompt: str, value: Any):
+        if self.maxsize <= 0:
+            return
+
+        key = self._to_key(prompt)
+        self._entries[key] = (value, time.monotonic())
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, prompt: str):
+        self._entries.pop(self._to_key(prompt), None)
+
+    def cache_clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def get_action_values(action: str) -> List[str]:
+    """Values typed by an action, such as the text written in a field"""
+    return [value.strip("\"'") for _, value in ACTION_VALUE_PATTERN.findall(action)]
+
+
+class SemanticCache:
+    """
+    Cache of generated actions looked up by semantic similarity of the instruction.
+    An entry only matches if the retrieved context exposes the same set of xpaths,
+    so similar instructions on different pages do not collide, and if the values typed
+    by its action all appear in the new instruction.
+
+    Args:
+        embedding (`BaseEmbedding`):
+            Embedding used to encode the instructions
+        threshold (`float`):
+            Minimum cosine similarity for two instructions to be considered equivalent
+        capacity (`int`):
+            Maximum number of entries, the oldest ones are dropped first
+        persist_path (`Optional[str]`):
+            `.npz` file the cache is loaded from and saved to by `save`
+        save_interval (`int`):
+            Number of new entries after which the cache is saved to `persist_path`, 0 to only save explicitly
+    """
+
+    def __init__(
+        self,
+        embedding: BaseEmbedding,
+        threshold: float = 0.92,
+        capacity: int = 10000,
+        persist_path: Optional[str] = None,
+        save_interval: int = 100,
+    ):
+        self.embedding = embedding
+        self.threshold = threshold
+        self.capacity = capacity
+        self.persist_path = persist_path
+        self.save_interval = save_interval
+        # Ring buffer of `capacity` normalized embeddings, allocated on the first entry
+        self._embeddings: Optional[np.ndarray] = None
+        self._codes: List[Optional[str]] = [None] * capacity
+        self._context_hashes: List[Optional[str]] = [None] * capacity
+        self._values: List[Optional[str]] = [None] * capacity
+        self._next = 0
+        self._size = 0
+        self._unsaved = 0
+        self._last_embedding: Optional[Tuple[str, np.ndarray]] = None
+        # Engines running concurrently can share the cache
+        self._lock = threading.RLock()
+
+        if persist_path is not None and os.path.isfile(persist_path):
+            self.load(persist_path)
+
+    def _context_hash(self, context: str) -> str:
+        fingerprint = "\n".join(sorted(set(extract_xpaths_from_html(context))))
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def _embed(self, query: str) -> np.ndarray:
+        # get() and add() are called with the same query, only embed it once.
+        # The query and its embedding are swapped together, other threads never see a mismatch
+        last = self._last_embedding
+        if last is not None and last[0] == query:
+            return last[1]
+        emb = np.asarray(self.embedding.get_query_embedding(query), np.float32)
+        emb = emb / (np.linalg.norm(emb) or 1.0)
+        self._last_embedding = (query, emb)
+        return emb
+
+    def _find(self, query: str, context: str, emb: np.ndarray) -> Optional[int]:
+        if self._size == 0:
+            return None
+        context_hash = self._context_hash(context)
+        candidates = [
+            i for i, h in enumerate(self._context_hashes) if h == context_hash
+        ]
+        if not candidates:
+            return None
+        scores = self._embeddings[candidates] @ emb
+        query = query.lower()
+        for best in np.argsort(-scores):
+            if scores[best] < self.threshold:
+                break
+            # Similar instructions can type different values, which must not be replayed
+            values = json.loads(self._values[candidates[best]])
+            if all(value.lower() in query for value in values):
+                return candidates[best]
+        return None
+
+    def get(self, query: str, context: str) -> Optional[str]:
+        emb = self._embed(query)
+        with self._lock:
+            index = self._find(query, context, emb)
+            return None if index is None else self._codes[index]
+
+    def add(self, query: str, context: str, code: str):
+        emb = self._embed(query)
+        with self._lock:
+            self._insert(
+                emb,
+                code,
+                self._context_hash(context),
+                json.dumps(get_action_values(code)),
+            )
+            self._unsaved += 1
+            if (
+                self.persist_path is not None
+                and self.save_interval > 0
+                and self._unsaved >= self.save_interval
+            ):
+                self.save()
+
+    def _insert(self, emb: np.ndarray, code: str, context_hash: str, values: str):
+        if self._embeddings is None or self._embeddings.shape[1] != emb.shape[0]:
+            self._embeddings = np.zeros((self.capacity, emb.shape[0]), np.float32)
+        # The oldest entry is overwritten once the buffer is full
+        slot = self._next
+        if self._codes[slot] is None:
+            self._size += 1
+        self._embeddings[slot] = emb
+        self._codes[slot] = code
+        self._context_hashes[slot] = context_hash
+        self._values[slot] = values
+        self._next = (slot + 1) % self.capacity
+
+    def discard(self, query: str, context: str):
+        emb = self._embed(query)
+        with self._lock:
+            index = self._find(query, context, emb)
+            if index is not None:
+                self._codes[index] = None
+                self._context_hashes[index] = None
+                self._values[index] = None
+                self._size -= 1
+
+    def _slots(self) -> List[int]:
+        """Occupied slots, from the oldest entry to the newest"""
+        order = [(self._next + i) % self.capacity for i in range(self.capacity)]
+        return [slot for slot in order if self._codes[slot] is not None]
+
+    def save(self, path: Optional[str] = None):
+        """Save the cache to `path`, defaults to `persist_path`"""
+        path = path or self.persist_path
+        if path is None:
+            raise ValueError("No path to save the semantic cache to")
+        with self._lock:
+            slots = self._slots()
+            embeddings = (
+                self._embeddings[slots]
+                if self._embeddings is not None
+                else np.zeros((0, 0), np.float32)
+            )
+            with open(path, "wb") as f:
+                np.savez(
+                    f,
+                    embeddings=embeddings,
+                    codes=np.array([self._codes[slot] for slot in slots], dtype=str),
+                    context_hashes=np.array(
+                        [self._context_hashes[slot] for slot in slots], dtype=str
+                    ),
+                    values=np.array([self._values[slot] for slot in slots], dtype=str),
+                )
+            self._unsaved = 0
+
+    def load(self, path: str):
+        with np.load(path) as data, self._lock:
+            self.cache_clear()
+            # Only the newest entries are kept if there are more than `capacity`
+            for emb, code, context_hash, values in list(
+                zip(
+                    data["embeddings"],
+                    data["codes"].tolist(),
+                    data["context_hashes"].tolist(),
+                    data["values"].tolist(),
+                )
+            )[-self.capacity :]:
+                self._insert(emb, code, context_hash, values)
+
+    def cache_clear(self):
+        with self._lock:
+            self._codes = [None] * self.capacity
+            self._context_hashes = [None] * self.capacity
+            self._values = [None] * self.capacity
+            self._next = 0
+            self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+
+class PlanCache:
+    """
+    Store of action templates extracted from successful instructions.
+    A new instruction on the same page containing enough of the keywords of a stored one
+    reuses its action, only asking a (cheaper) LLM to confirm it and fill the typed values.
+
+    Args:
+        llm (`Optional[BaseLLM]`):
+            LLM used to fill the placeholders, defaults to the navigation engine one
+        jsonl_file (`Optional[str]`):
+            File the plans are loaded from and appended to, plans are kept in memory if None
+        threshold (`float`):
+            Minimum share of the keywords of a plan an instruction must contain to reuse it
+    """
+
+    def __init__(
+        self,
+        llm: Optional[BaseLLM] = None,
+        jsonl_file: Optional[str] = None,
+        threshold: float = 0.6,
+    ):
+        self.llm = llm
+        self.jsonl_file = jsonl_file
+        self.threshold = threshold
+        self.plans: List[Dict[str, Any]] = []
+        self.extractor = JsonFromMarkdownExtractor()
+
+        if jsonl_file is not None and os.path.isfile(jsonl_file):
+            with open(jsonl_file) as f:
+                self.plans = [json.loads(line) for line in f if line.strip()]
+
+    @staticmethod
+    def keywords(instruction: str) -> Set[str]:
+        words = re.findall(r"[a-z0-9]+", instruction.lower())
+        return {w for w in words if w not in STOPWORDS}
+
+    @staticmethod
+    def to_template(action: str) -> Tuple[str, List[str]]:
+        """Replace the typed values of an action by placeholders"""
+        values = []
+
+        def placeholder(match: re.Match) -> str:
+            value = match.group(2).strip("\"'")
+            if not value:
+                return match.group(0)
+            values.append(value)
+            return f'{match.group(1)}"{{{{value_{len(values) - 1}}}}}"'
+
+        # Same pattern as get_action_values, no typed value is left in the template
+        template = ACTION_VALUE_PATTERN.sub(placeholder, action)
+        return template, values
+
+    def add(self, instruction: str, action: str, url: Optional[str]):
+        template, values = self.to_template(action)
+        plan = {
+            "instruction": instruction,
+            "keywords": sorted(
+                self.keywords(instruction) - self.keywords(" ".join(values))
+            ),
+            "url": url,
+            "template": template,
+            "values": values,
+        }
+        self.plans.append(plan)
+
+        if self.jsonl_file is not None:
+            with open(self.jsonl_file, "a") as f:
+                f.write(json.dumps(plan) + "\n")
+
+    def find(self, instruction: str, url: Optional[str]) -> Optional[Dict[str, Any]]:
+        keywords = self.keywords(instruction)
+        best, best_score = None, self.threshold
+        for plan in self.plans:
+            if plan["url"] != url:
+                continue
+            plan_keywords = set(plan["keywords"])
+            if not plan_keywords:
+                continue
+            score = len(keywords & plan_keywords) / len(plan_keywords)
+            if score > best_score:
+                best, best_score = plan, score
+        return best
+
+    def adapt(
+        self, plan: Dict[str, Any], instruction: str, llm: BaseLLM
+    ) -> Optional[str]:
+        """Fill the placeholders of a plan template, None if the plan does not apply"""
+        placeholders = [f"value_{i}" for i in range(len(plan["values"]))]
+        prompt = PLAN_ADAPTATION_PROMPT.format(
+            template_instruction=plan["instruction"],
+            values=json.dumps(dict(zip(placeholders, plan["values"]))),
+            instruction=instruction,
+        )
+        response = (self.llm or llm).complete(prompt).text
+        values = self.extractor.extract_as_object(response)
+        if not values.get("applicable"):
+            return None
+
+        action = plan["template"]
+        for placeholder in placeholders:
+            # escape the value for a double-quoted YAML string
+            value = json.dumps(str(values[placeholder]))[1:-1]
+            action = action.replace(f"{{{{{placeholder}}}}}", value)
+        return action
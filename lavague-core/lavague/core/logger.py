@@ -2,11 +2,19 @@ import uuid
 import pandas as pd
 import os
 from PIL import Image
+import hashlib
 import json
 import sqlite3
 import io
 from pandas.core.frame import DataFrame
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_SCALAR_TYPES = (str, int, float, bool, type(None))
+
 
 def load_images_from_folder(folder_path):
     images = []
@@ -55,20 +63,32 @@ class AgentLogger:
 
 
 class LocalLogger(AgentLogger):
+    """
+    Logger appending each log as a JSON line to `log_file_path`.
+    Retrieved HTML chunks are written once to a sidecar JSONL file, keyed by their hash,
+    and only referenced by hash in the logs.
+    """
+
     def __init__(self, log_file_path: str, ignore_keys: list[str] = None):
         self.log_file_path = log_file_path
+        self.html_file_path = os.path.splitext(log_file_path)[0] + "_html.jsonl"
         self.ignore_keys = ignore_keys
         if self.ignore_keys is None:
             self.ignore_keys = ["screenshots", "html"]
+        self._stored_html = set()
         super().__init__()
-        with open(self.log_file_path, "w") as f:
-            f.write("")
+        self._clear_files()
+
+    def _clear_files(self):
+        for path in (self.log_file_path, self.html_file_path):
+            with open(path, "w") as f:
+                f.write("")
+        self._stored_html.clear()
 
     def clear_logs(self):
         super().clear_logs()
-        # Clear the log file
-        with open(self.log_file_path, "w") as f:
-            f.write("")
+        # Clear the log files
+        self._clear_files()
 
     def add_log(self, log: dict):
         super().add_log(log)
@@ -81,21 +101,60 @@ class LocalLogger(AgentLogger):
     def custom_serializer(self, obj):
         if isinstance(obj, dict):
             return {
-                k: self.custom_serializer(v)
+                k: self.store_html(v)
+                if k == "retrieved_html"
+                else self.custom_serializer(v)
                 for k, v in obj.items()
                 if k not in self.ignore_keys
             }
-        elif isinstance(obj, list):
+        elif isinstance(obj, (list, tuple)):
             return [self.custom_serializer(v) for v in obj]
-        try:
-            json.dumps(obj)
+        elif isinstance(obj, JSON_SCALAR_TYPES):
             return obj
-        except (TypeError, OverflowError):
-            return None
+        # Images and other objects are not serialized
+        return None
+
+    def store_html(self, html_chunks):
+        """Write the chunks not stored yet to the sidecar file, return their references"""
+        if not isinstance(html_chunks, list):
+            return self.custom_serializer(html_chunks)
+        references = []
+        new_chunks = []
+        for chunk in html_chunks:
+            if not isinstance(chunk, str):
+                references.append(self.custom_serializer(chunk))
+                continue
+            chunk_hash = hashlib.blake2b(chunk.encode("utf-8")).hexdigest()
+            if chunk_hash not in self._stored_html:
+                self._stored_html.add(chunk_hash)
+                new_chunks.append({"hash": chunk_hash, "html": chunk})
+            references.append({"hash": chunk_hash, "len": len(chunk)})
+        if new_chunks:
+            with open(self.html_file_path, "a") as f:
+                for new_chunk in new_chunks:
+                    f.write(dumps_json(new_chunk))
+                    f.write("\n")
+        return references
 
     # Function to serialize dictionary with ignoring non-serializable properties
     def serialize_dict(self, input_dict):
-        return json.dumps(self.custom_serializer(input_dict))
+        return dumps_json(self.custom_serializer(input_dict))
+
+
+def _json_default(obj):
+    # orjson rejects subclasses of float such as numpy.float64, json.dumps writes them as floats
+    if isinstance(obj, float):
+        return float(obj)
+    return None
+
+
+def dumps_json(obj) -> str:
+    """Serialize to JSON with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(
+            obj, default=_json_default, option=orjson.OPT_NON_STR_KEYS
+        ).decode("utf-8")
+    return json.dumps(obj, default=_json_default)
 
 
 class LocalDBLogger(AgentLogger):
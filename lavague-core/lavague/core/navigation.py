@@ -1,7 +1,15 @@
 from io import BytesIO
+import asyncio
+import hashlib
+import inspect
 import logging
+import os
+import re
 import time
-from typing import Any, List, Optional
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple
 from lavague.core.action_template import ActionTemplate
 from lavague.core.context import Context, get_default_context
 from lavague.core.exceptions import NavigationException
@@ -10,22 +18,27 @@ from lavague.core.extractors import (
     YamlFromMarkdownExtractor,
     DynamicExtractor,
     extract_xpaths_from_html,
+    extract_xpath_from_action,
 )
 from lavague.core.retrievers import BaseHtmlRetriever, get_default_retriever
 from lavague.core.utilities.web_utils import (
     display_screenshot,
-    sort_files_by_creation,
+    resize_screenshot,
+    screenshot_size,
 )
 from lavague.core.exceptions import HallucinatedException, ElementOutOfContextException
 from lavague.core.logger import AgentLogger
 from lavague.core.base_engine import BaseEngine, ActionResult
 from lavague.core.base_driver import BaseDriver
+from lavague.core.cache import PlanCache, ResponseCache, SemanticCache
 from llama_index.core import QueryBundle, PromptTemplate
 from PIL import Image
 from llama_index.core.base.llms.base import BaseLLM
 from llama_index.core.embeddings import BaseEmbedding
 from lavague.core.utilities.profiling import time_profiler
 
+# The driver capability is the large invariant part of the prompt, it must stay first
+# so that providers can cache the prompt prefix across calls
 NAVIGATION_ENGINE_PROMPT_TEMPLATE = ActionTemplate(
     """
 {driver_capability}
@@ -42,6 +55,26 @@ Completion:
     YamlFromMarkdownExtractor(),
 )
 
+# Number of screenshots per row when several are displayed at once
+SCREENSHOT_GRID_COLUMNS = 2
+
+# A markdown code block with its closing fence, the action can be extracted once it is found
+CLOSED_CODE_BLOCK_PATTERN = re.compile(r"```[^\n]*\n.*?```", re.DOTALL)
+
+# Driver method performing each navigation control, in the order they are looked up
+NAVIGATION_CONTROLS = {
+    "SCROLL_DOWN": "scroll_down",
+    "SCROLL_UP": "scroll_up",
+    "WAIT": "wait",
+    "BACK": "back",
+    "SCAN": "get_screenshots_whole_page",
+    "MAXIMIZE_WINDOW": "maximize_window",
+    "SWITCH_TAB": "switch_tab",
+}
+
+# Marks the variables of the prompt template when it is compiled into fragments
+PROMPT_SENTINEL_PATTERN = re.compile(r"\x00(\w+)\x00")
+
 # JSON schema for the action shape
 JSON_SCHEMA = {
     "type": "array",
@@ -90,6 +123,14 @@ class NavigationEngine(BaseEngine):
             Logger to log the actions taken by the agent
         embedding: (`BaseEmbedding`)
             Embedding to use for the retriever
+        response_cache: (`ResponseCache`)
+            Cache of successful LLM responses, keyed by the exact prompt
+        semantic_cache: (`SemanticCache`)
+            Optional cache of successful actions, looked up by instruction similarity
+        plan_cache: (`PlanCache`)
+            Optional store of action templates reused for similar instructions, skipping retrieval
+        stream_response: (`bool`)
+            Stream the LLM response and stop it as soon as its first code block is closed
     """
 
     def __init__(
@@ -105,6 +146,10 @@ class NavigationEngine(BaseEngine):
         display: bool = False,
         raise_on_error: bool = False,
         embedding: BaseEmbedding = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        plan_cache: Optional[PlanCache] = None,
+        stream_response: bool = False,
     ):
         if llm is None:
             llm: BaseLLM = get_default_context().llm
@@ -112,9 +157,10 @@ class NavigationEngine(BaseEngine):
             retriever = get_default_retriever(driver, embedding=embedding)
         self.driver: BaseDriver = driver
         self.llm: BaseLLM = llm
+        self._llm_model_name = get_model_name(llm)
         self.retriever: BaseHtmlRetriever = retriever
         self.prompt_template: PromptTemplate = prompt_template.partial_format(
-            driver_capability=driver.get_capability()
+            driver_capability=driver.get_cached_capability()
         )
         self.extractor: BaseExtractor = extractor
         self.time_between_actions = time_between_actions
@@ -123,6 +169,18 @@ class NavigationEngine(BaseEngine):
         self.display = display
         self.raise_on_error = raise_on_error
         self.shape_validator = JSON_SCHEMA
+        self.response_cache = (
+            response_cache if response_cache is not None else ResponseCache()
+        )
+        self.semantic_cache = semantic_cache
+        self.plan_cache = plan_cache
+        self.stream_response = stream_response
+        self._html_hash: Optional[str] = None
+        self._nodes_cache: Dict[Tuple[str, bool], List[str]] = {}
+        self._displayed_screenshots: Set[str] = set()
+        self._recent_screenshots: Deque[Image.Image] = deque(maxlen=8)
+        self._driver_executor: Optional[ThreadPoolExecutor] = None
+        self._compile_prompt()
 
     @classmethod
     def from_context(
@@ -156,7 +214,16 @@ class NavigationEngine(BaseEngine):
         """
         viewport_only = not self.driver.previously_scanned
 
-        html = self.driver.get_html()
+        html = self._call_driver(self.driver.get_html)
+
+        # Nodes are reused until the page changes or an action is performed
+        html_hash = hashlib.blake2b(html.encode("utf-8")).hexdigest()
+        if html_hash != self._html_hash:
+            self._html_hash = html_hash
+            self._nodes_cache = {}
+        cache_key = (query, viewport_only)
+        if cache_key in self._nodes_cache:
+            return self._nodes_cache[cache_key]
 
         with time_profiler("Retriever Inference", html_size=len(html)) as profiler:
             source_nodes = self.retriever.retrieve(
@@ -165,10 +232,55 @@ class NavigationEngine(BaseEngine):
 
             profiler["retrieved_nodes_size"] = sum(len(node) for node in source_nodes)
 
+        self._nodes_cache[cache_key] = source_nodes
         return source_nodes
 
+    def invalidate_nodes_cache(self):
+        """Forget the retrieved nodes, to call whenever the page may have changed"""
+        self._html_hash = None
+        self._nodes_cache = {}
+
+    def _call_driver(self, method: Callable, *args: Any) -> Any:
+        """Call a driver method holding the driver command lock, shared with other engines"""
+        with self.driver.command_lock:
+            return method(*args)
+
+    def _get_driver_executor(self) -> ThreadPoolExecutor:
+        """Single thread running the blocking calls of `aexecute_instruction`, created on first use"""
+        if self._driver_executor is None:
+            self._driver_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="lavague-driver"
+            )
+        return self._driver_executor
+
+    def close(self):
+        """Shut down the thread used by `aexecute_instruction`, the driver is left open"""
+        if self._driver_executor is not None:
+            self._driver_executor.shutdown()
+            self._driver_executor = None
+
     def add_knowledge(self, knowledge: str):
-        self.prompt_template = self.prompt_template + knowledge
+        """Add knowledge to the static part of the prompt, keeping it a cacheable prefix"""
+        self.prompt_template.kwargs["driver_capability"] += "\n" + knowledge
+        self._compile_prompt()
+
+    def _compile_prompt(self):
+        """Split the prompt template once into its literal fragments and variable names"""
+        sentinels = {
+            var: f"\x00{var}\x00"
+            for var in self.prompt_template.template_vars
+            if var not in self.prompt_template.kwargs
+        }
+        # Even indices are literal text, odd indices are variable names
+        self._prompt_fragments: List[str] = PROMPT_SENTINEL_PATTERN.split(
+            self.prompt_template.format(**sentinels)
+        )
+
+    def _format_prompt(self, **kwargs: Any) -> str:
+        return "".join(
+            fragment if i % 2 == 0 else str(kwargs[fragment])
+            for i, fragment in enumerate(self._prompt_fragments)
+        )
 
     def get_action_from_context(self, context: str, query: str) -> str:
         """
@@ -176,15 +288,93 @@ class NavigationEngine(BaseEngine):
         """
         authorized_xpaths = extract_xpaths_from_html(context)
 
-        prompt = self.prompt_template.format(
+        prompt = self._format_prompt(
             context_str=context,
             query_str=query,
             authorized_xpaths=authorized_xpaths,
         )
 
-        response = self.llm.complete(prompt).text
-        code = self.extractor.extract(response)
-        return code
+        cached = self._get_cached_action(prompt, context, query)
+        if cached is not None:
+            return cached[1]
+
+        # The action is neither verified nor executed here, it is not cached
+        response = self._complete(prompt)
+        return self.extractor.extract(response)
+
+    def _complete(self, prompt: str) -> str:
+        """Get the LLM response, with `stream_response` it stops once the action block is closed"""
+        if not self.stream_response:
+            return self.llm.complete(prompt).text
+
+        response = ""
+        stream = self.llm.stream_complete(prompt)
+        try:
+            for chunk in stream:
+                response += chunk.delta or ""
+                if is_action_block_closed(response):
+                    break
+        finally:
+            # Cancel the rest of the generation
+            stream.close()
+        return response
+
+    async def _acomplete(self, prompt: str) -> str:
+        """Async version of `_complete`"""
+        if not self.stream_response:
+            return (await self.llm.acomplete(prompt)).text
+
+        response = ""
+        stream = await self.llm.astream_complete(prompt)
+        try:
+            async for chunk in stream:
+                response += chunk.delta or ""
+                if is_action_block_closed(response):
+                    break
+        finally:
+            await stream.aclose()
+        return response
+
+    def _get_cached_action(
+        self, prompt: str, context: str, query: str
+    ) -> Optional[Tuple[str, str]]:
+        """Return a previously successful (response, action) pair for this prompt, if any"""
+        cached = self.response_cache.get(prompt)
+        if cached is None and self.semantic_cache is not None:
+            try:
+                code = self.semantic_cache.get(query, context)
+            except Exception as e:
+                # The semantic cache calls the embedding, a failure is only a cache miss
+                logging_print.warning(f"Semantic cache lookup failed: {e}")
+                code = None
+            if code is not None:
+                cached = (code, code)
+        return cached
+
+    def _cache_action(
+        self, prompt: str, context: str, query: str, response: str, action: str
+    ):
+        """Cache an executed action, failing to do so must not fail the action"""
+        try:
+            self.response_cache.set(prompt, (response, action))
+            if self.semantic_cache is not None:
+                self.semantic_cache.add(query, context, action)
+        except Exception as e:
+            logging_print.warning(f"Could not cache the action: {e}")
+
+    def _discard_cached_action(self, prompt: str, context: str, query: str):
+        self.response_cache.discard(prompt)
+        if self.semantic_cache is not None:
+            try:
+                self.semantic_cache.discard(query, context)
+            except Exception as e:
+                logging_print.warning(f"Could not discard the cached action: {e}")
+
+    def cache_clear(self):
+        """Clear the cached LLM responses"""
+        self.response_cache.cache_clear()
+        if self.semantic_cache is not None:
+            self.semantic_cache.cache_clear()
 
     def set_display(self, display: bool):
         self.display = display
@@ -219,9 +409,6 @@ class NavigationEngine(BaseEngine):
         action_full = ""
         output = None
 
-        action_nb = 0
-        navigation_log_total = []
-
         logging_print.debug("Query for retriever: " + instruction)
 
         start = time.time()
@@ -232,7 +419,7 @@ class NavigationEngine(BaseEngine):
         llm_context = "\n".join(source_nodes)
         success = False
         logger = self.logger
-        self.url_input = self.driver.get_url()
+        self.url_input = self._call_driver(self.driver.get_url)
 
         navigation_log = {
             "navigation_engine_input": instruction,
@@ -241,56 +428,60 @@ class NavigationEngine(BaseEngine):
             "retrieval_name": self.retriever.__class__.__name__,
         }
 
+        # The prompt does not change between attempts, format it only once
+        authorized_xpaths = extract_xpaths_from_html(llm_context)
+        prompt = self._format_prompt(
+            context_str=llm_context,
+            query_str=instruction,
+            authorized_xpaths=authorized_xpaths,
+        )
+
         action_outcomes = []
+        self._reset_displayed_screenshots()
         for _ in range(self.n_attempts):
             if success:
                 break
             if self.display:
-                try:
-                    scr_path = self.driver.get_current_screenshot_folder()
-                    lst = sort_files_by_creation(scr_path)
-                    for scr in lst:
-                        img = Image.open(scr_path.as_posix() + "/" + scr)
-                        display_screenshot(img)
-                        time.sleep(0.35)
-                except:
-                    pass
+                self._display_screenshots()
             start = time.time()
-            authorized_xpaths = extract_xpaths_from_html(llm_context)
-            prompt = self.prompt_template.format(
-                context_str=llm_context,
-                query_str=instruction,
-                authorized_xpaths=authorized_xpaths,
-            )
-            response = self.llm.complete(prompt).text
+            cached = self._get_cached_action(prompt, llm_context, instruction)
+            if cached is None:
+                response = self._complete(prompt)
+            else:
+                response = cached[0]
             end = time.time()
             action_generation_time = end - start
             action_outcome = {
                 "llm_raw_response": response,
                 "action_generation_time": action_generation_time,
                 "navigation_engine_full_prompt": prompt,
-                "navigation_engine_llm": get_model_name(self.llm),
+                "navigation_engine_llm": self._llm_model_name,
             }
 
             try:
-                # We extract the action
-                action = self.extractor.extract(response)
-                self._verify_llm_reponse(response, llm_context)
+                # We extract the action, cached responses were already verified
+                if cached is None:
+                    action = self.extractor.extract(response)
+                    self._verify_llm_reponse(response, llm_context)
+                else:
+                    action = cached[1]
                 action_outcome["action"] = action
                 action_full += action
 
                 # Get information to see which elements are selected
-                vision_data = self.driver.get_highlighted_element(action)
+                vision_data = self._call_driver(
+                    self.driver.get_highlighted_element, action
+                )
                 action_full += action
+                ratio = action_engine.screenshot_ratio
+                # all highlighted screenshots are taken from the same viewport
+                size = (
+                    screenshot_size(vision_data[0]["screenshot"], ratio)
+                    if vision_data
+                    else None
+                )
                 for item in vision_data:
-                    screenshot = item["screenshot"]
-                    if action_engine.screenshot_ratio != 1:
-                        screenshot = screenshot.resize(
-                            (
-                                int(screenshot.width / action_engine.screenshot_ratio),
-                                int(screenshot.height / action_engine.screenshot_ratio),
-                            )
-                        )
+                    screenshot = resize_screenshot(item["screenshot"], ratio, size)
                     self.image_display = screenshot
                     yield (
                         self.objective,
@@ -300,7 +491,8 @@ class NavigationEngine(BaseEngine):
                         output,
                     )
 
-                self.driver.exec_code(action)
+                self.invalidate_nodes_cache()
+                self._call_driver(self.driver.exec_code, action)
                 self.history[-1] = ChatMessage(
                     role="assistant",
                     content=f"{action_engine.world_model_output}\n",
@@ -311,7 +503,7 @@ class NavigationEngine(BaseEngine):
                 self.history.append(
                     ChatMessage(role="assistant", content="⏳ Loading the page...")
                 )
-                self.url_input = self.driver.get_url()
+                self.url_input = self._call_driver(self.driver.get_url)
                 yield (
                     self.objective,
                     self.url_input,
@@ -320,17 +512,10 @@ class NavigationEngine(BaseEngine):
                     output,
                 )
                 time.sleep(1)
-                img = self.driver.get_screenshot_as_png()
-                img = BytesIO(img)
-                img = Image.open(img)
-                if action_engine.screenshot_ratio != 1:
-                    img = img.resize(
-                        (
-                            int(img.width / action_engine.screenshot_ratio),
-                            int(img.height / action_engine.screenshot_ratio),
-                        )
-                    )
-                self.image_display = img
+                img = Image.open(
+                    BytesIO(self._call_driver(self.driver.get_screenshot_as_png))
+                )
+                self.image_display = resize_screenshot(img, ratio)
                 yield (
                     self.objective,
                     self.url_input,
@@ -346,18 +531,20 @@ class NavigationEngine(BaseEngine):
                 navigation_log["vision_data"] = vision_data
             except Exception as e:
                 logging_print.error(f"Navigation error: {e}")
+                self._discard_cached_action(prompt, llm_context, instruction)
                 action_outcome["success"] = False
                 action_outcome["error"] = str(e)
                 if self.raise_on_error:
                     raise e
 
+            # The action was executed, caching it happens outside of the attempt
+            if success and cached is None:
+                self._cache_action(prompt, llm_context, instruction, response, action)
+
             action_outcomes.append(action_outcome)
             self.driver.wait_for_idle()
 
         navigation_log["action_outcomes"] = action_outcomes
-        navigation_log["action_nb"] = action_nb
-        action_nb += 1
-        navigation_log_total.append(navigation_log)
 
         if not success:
             self.history[-1] = ChatMessage(
@@ -371,7 +558,7 @@ class NavigationEngine(BaseEngine):
             log = {
                 "engine": "Navigation Engine",
                 "instruction": instruction,
-                "engine_log": navigation_log_total,
+                "engine_log": navigation_log,
                 "success": success,
                 "output": None,
                 "code": action_full,
@@ -387,7 +574,7 @@ class NavigationEngine(BaseEngine):
         )
         action_engine.ret = output
 
-        self.url_input = self.driver.get_url()
+        self.url_input = self._call_driver(self.driver.get_url)
 
         yield (
             self.objective,
@@ -414,6 +601,214 @@ class NavigationEngine(BaseEngine):
                         exception = HallucinatedException(xpath)
                     raise exception
 
+    def _execute_cached_plan(
+        self, instruction: str, url: Optional[str]
+    ) -> Optional[ActionResult]:
+        """Execute the instruction from a cached plan, None if no plan could be used"""
+        plan = self.plan_cache.find(instruction, url)
+        if plan is None:
+            return None
+
+        start = time.time()
+        try:
+            with time_profiler("Plan Adaptation"):
+                action = self.plan_cache.adapt(plan, instruction, self.llm)
+            if action is None:
+                return None
+            for xpath in extract_xpath_from_action(action):
+                if not self._call_driver(self.driver.check_visibility, xpath):
+                    return None
+            self.invalidate_nodes_cache()
+            with time_profiler("Execute Code"):
+                self._call_driver(self.driver.exec_code, action)
+        except Exception as e:
+            logging_print.debug(f"Cached plan could not be used: {e}")
+            return None
+        time.sleep(self.time_between_actions)
+
+        if self.logger:
+            navigation_log = {
+                "navigation_engine_input": instruction,
+                "retrieved_html": [],
+                "plan_instruction": plan["instruction"],
+                "action_outcomes": [
+                    {
+                        "action": action,
+                        "action_generation_time": time.time() - start,
+                        "success": True,
+                    }
+                ],
+            }
+            self.logger.add_log(
+                {
+                    "engine": "Navigation Engine",
+                    "instruction": instruction,
+                    "engine_log": navigation_log,
+                    "success": True,
+                    "output": None,
+                    "code": action,
+                }
+            )
+
+        return ActionResult(
+            instruction=instruction,
+            code=action,
+            success=True,
+            output=None,
+        )
+
+    def _retrieve_context(self, instruction: str) -> Tuple[List[str], dict]:
+        """Retrieve the nodes for an instruction, along with the navigation log to fill"""
+        logging_print.debug("Query for retriever: " + instruction)
+
+        start = time.time()
+        source_nodes = self.get_nodes(instruction)
+        end = time.time()
+        retrieval_time = end - start
+
+        navigation_log = {
+            "navigation_engine_input": instruction,
+            "retrieved_html": source_nodes,
+            "retrieval_time": retrieval_time,
+            "retrieval_name": self.retriever.__class__.__name__,
+        }
+        return source_nodes, navigation_log
+
+    def _reset_displayed_screenshots(self):
+        """Start the screenshots display of a new instruction"""
+        self._displayed_screenshots.clear()
+        self._recent_screenshots.clear()
+
+    def _display_screenshots(self):
+        try:
+            scr_path = self.driver.get_current_screenshot_folder()
+            # Only open the screenshots taken since the last display
+            new_entries = sorted(
+                (
+                    entry
+                    for entry in os.scandir(scr_path)
+                    if entry.is_file() and entry.path not in self._displayed_screenshots
+                ),
+                key=lambda entry: entry.stat().st_ctime,
+            )
+            if not new_entries:
+                return
+            for entry in new_entries[-self._recent_screenshots.maxlen :]:
+                self._recent_screenshots.append(Image.open(entry.path))
+            self._displayed_screenshots.update(entry.path for entry in new_entries)
+
+            # Display the screenshots of the instruction in a single grid image
+            columns = min(len(self._recent_screenshots), SCREENSHOT_GRID_COLUMNS)
+            images = [
+                resize_screenshot(img, columns) for img in self._recent_screenshots
+            ]
+            tile_width = max(img.width for img in images)
+            tile_height = max(img.height for img in images)
+            rows = -(-len(images) // columns)
+            composite = Image.new(
+                "RGB", (columns * tile_width, rows * tile_height), "white"
+            )
+            for i, img in enumerate(images):
+                row, column = divmod(i, columns)
+                composite.paste(img, (column * tile_width, row * tile_height))
+            display_screenshot(composite)
+        except:
+            pass
+
+    def _execute_response(
+        self,
+        instruction: str,
+        prompt: str,
+        llm_context: str,
+        authorized_xpaths: List[str],
+        response: str,
+        cached: Optional[Tuple[str, str]],
+        action_outcome: dict,
+        navigation_log: dict,
+        page_url: Optional[str],
+    ) -> bool:
+        """Extract the action from the LLM response and execute it, return True on success"""
+        try:
+            # We extract the action, cached responses were already verified
+            if cached is None:
+                action = self.extractor.extract(response)
+                self._verify_llm_reponse(response, authorized_xpaths)
+            else:
+                action = cached[1]
+
+            action_outcome["action"] = action
+            if action is None:
+                raise ValueError("No action could be extracted from the LLM response")
+
+            # Get information to see which elements are selected
+            vision_data = self._call_driver(self.driver.get_highlighted_element, action)
+            if self.display:
+                for item in vision_data:
+                    display_screenshot(item["screenshot"])
+                    time.sleep(0.2)
+
+            self.invalidate_nodes_cache()
+            with time_profiler("Execute Code"):
+                self._call_driver(self.driver.exec_code, action)
+            time.sleep(self.time_between_actions)
+            if self.display:
+                try:
+                    screenshot = self._call_driver(self.driver.get_screenshot_as_png)
+                    screenshot = BytesIO(screenshot)
+                    screenshot = Image.open(screenshot)
+                    display_screenshot(screenshot)
+                except:
+                    pass
+            action_outcome["success"] = True
+            navigation_log["vision_data"] = vision_data
+        except Exception as e:
+            logging_print.error(f"Navigation error: {e}")
+            self._discard_cached_action(prompt, llm_context, instruction)
+            action_outcome["success"] = False
+            action_outcome["error"] = str(e)
+            if self.raise_on_error:
+                raise e
+            return False
+
+        # The action was executed, caching it happens outside of the attempt
+        if cached is None:
+            self._cache_action(prompt, llm_context, instruction, response, action)
+            if self.plan_cache is not None:
+                try:
+                    self.plan_cache.add(instruction, action, page_url)
+                except Exception as e:
+                    logging_print.warning(f"Could not add the plan: {e}")
+        return True
+
+    def _log_instruction(
+        self,
+        instruction: str,
+        navigation_log: dict,
+        action_outcomes: List[dict],
+        success: bool,
+        action_full: str,
+    ) -> ActionResult:
+        navigation_log["action_outcomes"] = action_outcomes
+
+        if self.logger:
+            log = {
+                "engine": "Navigation Engine",
+                "instruction": instruction,
+                "engine_log": navigation_log,
+                "success": success,
+                "output": None,
+                "code": action_full,
+            }
+
+            self.logger.add_log(log)
+
+        return ActionResult(
+            instruction=instruction,
+            code=action_full,
+            success=success,
+            output=None,
+        )
+
     def execute_instruction(self, instruction: str) -> ActionResult:
         """
         Generates code and executes it to answer the instruction
@@ -428,51 +823,41 @@ class NavigationEngine(BaseEngine):
 
         success = False
         action_full = ""
-        action_nb = 0
-        navigation_log_total = []
+        page_url = None
 
-        logging_print.debug("Query for retriever: " + instruction)
-
-        start = time.time()
-        source_nodes = self.get_nodes(instruction)
-        end = time.time()
-        retrieval_time = end - start
+        if self.plan_cache is not None:
+            page_url = self._call_driver(self.driver.get_url)
+            result = self._execute_cached_plan(instruction, page_url)
+            if result is not None:
+                return result
 
+        source_nodes, navigation_log = self._retrieve_context(instruction)
         llm_context = "\n".join(source_nodes)
-        success = False
-        logger = self.logger
 
-        navigation_log = {
-            "navigation_engine_input": instruction,
-            "retrieved_html": source_nodes,
-            "retrieval_time": retrieval_time,
-            "retrieval_name": self.retriever.__class__.__name__,
-        }
+        # The prompt does not change between attempts, format it only once
+        authorized_xpaths = extract_xpaths_from_html(llm_context)
+        prompt = self._format_prompt(
+            context_str=llm_context,
+            query_str=instruction,
+            authorized_xpaths=authorized_xpaths,
+        )
 
         action_outcomes = []
+        self._reset_displayed_screenshots()
         for _ in range(self.n_attempts):
             if success:
                 break
             if self.display:
-                try:
-                    scr_path = self.driver.get_current_screenshot_folder()
-                    lst = sort_files_by_creation(scr_path)
-                    for scr in lst:
-                        img = Image.open(scr_path.as_posix() + "/" + scr)
-                        display_screenshot(img)
-                        time.sleep(0.35)
-                except:
-                    pass
+                self._display_screenshots()
             start = time.time()
-            authorized_xpaths = extract_xpaths_from_html(llm_context)
-            prompt = self.prompt_template.format(
-                context_str=llm_context,
-                query_str=instruction,
-                authorized_xpaths=authorized_xpaths,
-            )
-
-            with time_profiler("Navigation Engine Inference", prompt_size=len(prompt)):
-                response = self.llm.complete(prompt).text
+            cached = self._get_cached_action(prompt, llm_context, instruction)
+            if cached is None:
+                with time_profiler(
+                    "Navigation Engine Inference", prompt_size=len(prompt)
+                ):
+                    response = self._complete(prompt)
+            else:
+                response = cached[0]
 
             end = time.time()
             action_generation_time = end - start
@@ -480,69 +865,123 @@ class NavigationEngine(BaseEngine):
                 "llm_raw_response": response,
                 "action_generation_time": action_generation_time,
                 "navigation_engine_full_prompt": prompt,
-                "navigation_engine_llm": get_model_name(self.llm),
+                "navigation_engine_llm": self._llm_model_name,
             }
 
-            try:
-                # We extract the action
-                action = self.extractor.extract(response)
-                self._verify_llm_reponse(response, authorized_xpaths)
+            success = self._execute_response(
+                instruction,
+                prompt,
+                llm_context,
+                authorized_xpaths,
+                response,
+                cached,
+                action_outcome,
+                navigation_log,
+                page_url,
+            )
+            action_full += action_outcome.get("action") or ""
+            action_outcomes.append(action_outcome)
 
-                action_outcome["action"] = action
-                action_full += action
+        return self._log_instruction(
+            instruction, navigation_log, action_outcomes, success, action_full
+        )
 
-                # Get information to see which elements are selected
-                vision_data = self.driver.get_highlighted_element(action)
-                if self.display:
-                    for item in vision_data:
-                        display_screenshot(item["screenshot"])
-                        time.sleep(0.2)
-
-                with time_profiler("Execute Code"):
-                    self.driver.exec_code(action)
-                time.sleep(self.time_between_actions)
-                if self.display:
-                    try:
-                        screenshot = self.driver.get_screenshot_as_png()
-                        screenshot = BytesIO(screenshot)
-                        screenshot = Image.open(screenshot)
-                        display_screenshot(screenshot)
-                    except:
-                        pass
-                success = True
-                action_outcome["success"] = True
-                navigation_log["vision_data"] = vision_data
-            except Exception as e:
-                logging_print.error(f"Navigation error: {e}")
-                action_outcome["success"] = False
-                action_outcome["error"] = str(e)
-                if self.raise_on_error:
-                    raise e
+    async def aexecute_instruction(self, instruction: str) -> ActionResult:
+        """
+        Async variant of `execute_instruction`: the LLM is awaited and the blocking
+        driver calls run on a thread dedicated to this engine, so that several engines
+        can progress concurrently. Call `close` once the engine is no longer used.
 
-            action_outcomes.append(action_outcome)
+        Drivers bound to the thread that created them, such as `PlaywrightDriver` which
+        uses the Playwright sync API, cannot be used from that thread and are rejected.
 
-        navigation_log["action_outcomes"] = action_outcomes
-        navigation_log["action_nb"] = action_nb
-        action_nb += 1
-        navigation_log_total.append(navigation_log)
+        Args:
+            instruction (`str`): The instruction to perform
 
-        if logger:
-            log = {
-                "engine": "Navigation Engine",
-                "instruction": instruction,
-                "engine_log": navigation_log_total,
-                "success": success,
-                "output": None,
-                "code": action_full,
+        Return:
+            `ActionResult`: The result of the navigation, its output is always None
+        """
+        if getattr(self.driver, "thread_bound", False):
+            raise ValueError(
+                f"{type(self.driver).__name__} can only be used from the thread that created it, "
+                "use execute_instruction instead"
+            )
+        loop = asyncio.get_running_loop()
+        executor = self._get_driver_executor()
+        success = False
+        action_full = ""
+        page_url = None
+
+        if self.plan_cache is not None:
+            page_url = await loop.run_in_executor(
+                executor, self._call_driver, self.driver.get_url
+            )
+            result = await loop.run_in_executor(
+                executor, self._execute_cached_plan, instruction, page_url
+            )
+            if result is not None:
+                return result
+
+        source_nodes, navigation_log = await loop.run_in_executor(
+            executor, self._retrieve_context, instruction
+        )
+        llm_context = "\n".join(source_nodes)
+
+        # The prompt does not change between attempts, format it only once
+        authorized_xpaths = extract_xpaths_from_html(llm_context)
+        prompt = self._format_prompt(
+            context_str=llm_context,
+            query_str=instruction,
+            authorized_xpaths=authorized_xpaths,
+        )
+
+        action_outcomes = []
+        self._reset_displayed_screenshots()
+        for _ in range(self.n_attempts):
+            if success:
+                break
+            if self.display:
+                await loop.run_in_executor(executor, self._display_screenshots)
+            start = time.time()
+            # The semantic cache lookup calls the embedding, it must not block the loop
+            cached = await loop.run_in_executor(
+                executor, self._get_cached_action, prompt, llm_context, instruction
+            )
+            if cached is None:
+                with time_profiler(
+                    "Navigation Engine Inference", prompt_size=len(prompt)
+                ):
+                    response = await self._acomplete(prompt)
+            else:
+                response = cached[0]
+
+            end = time.time()
+            action_generation_time = end - start
+            action_outcome = {
+                "llm_raw_response": response,
+                "action_generation_time": action_generation_time,
+                "navigation_engine_full_prompt": prompt,
+                "navigation_engine_llm": self._llm_model_name,
             }
 
-            logger.add_log(log)
+            success = await loop.run_in_executor(
+                executor,
+                self._execute_response,
+                instruction,
+                prompt,
+                llm_context,
+                authorized_xpaths,
+                response,
+                cached,
+                action_outcome,
+                navigation_log,
+                page_url,
+            )
+            action_full += action_outcome.get("action") or ""
+            action_outcomes.append(action_outcome)
 
-        return ActionResult(
-            instruction=instruction,
-            code=action_full,
-            success=success,
-            output=None,
+        return self._log_instruction(
+            instruction, navigation_log, action_outcomes, success, action_full
         )
 
 
@@ -568,41 +1007,29 @@ class NavigationControl(BaseEngine):
         self.display = display
 
     def execute_instruction(self, instruction: str) -> ActionResult:
-        import inspect
-
         code = ""
         output = None
         success = True
         logger = self.logger
 
+        if self.navigation_engine is not None:
+            # Controls scroll or change the page, previously retrieved nodes are stale
+            self.navigation_engine.invalidate_nodes_cache()
+
         try:
-            if "SCROLL_DOWN" in instruction:
-                self.driver.scroll_down()
-                code = inspect.getsource(self.driver.scroll_down)
-            elif "SCROLL_UP" in instruction:
-                self.driver.scroll_up()
-                code = inspect.getsource(self.driver.scroll_up)
-            elif "WAIT" in instruction:
-                self.driver.wait(self.time_between_actions)
-                code = inspect.getsource(self.driver.wait)
-            elif "BACK" in instruction:
-                self.driver.back()
-                code = inspect.getsource(self.driver.back)
-            elif "SCAN" in instruction:
-                self.driver.get_screenshots_whole_page()
-                code = inspect.getsource(self.driver.get_screenshots_whole_page)
-            elif "MAXIMIZE_WINDOW" in instruction:
-                self.driver.maximize_window()
-                code = inspect.getsource(self.driver.maximize_window)
-            elif "SWITCH_TAB" in instruction:
+            control = get_navigation_control(instruction)
+            method = getattr(self.driver, NAVIGATION_CONTROLS[control])
+            if control == "WAIT":
+                method(self.time_between_actions)
+            elif control == "SWITCH_TAB":
                 tab_id = int(instruction.split(" ")[1])
                 try:
-                    self.driver.switch_tab(tab_id=tab_id)
+                    method(tab_id=tab_id)
                 except Exception as e:
                     raise ValueError(f"Error while switching tab: {e}")
-                code = inspect.getsource(self.driver.switch_tab)
             else:
-                raise ValueError(f"Unknown instruction: {instruction}")
+                method()
+            code = get_method_source(method)
 
         except NavigationException as e:
             success = False
@@ -627,13 +1054,33 @@ class NavigationControl(BaseEngine):
         )
 
 
+def get_navigation_control(instruction: str) -> str:
+    control = instruction.split(" ", 1)[0]
+    if control in NAVIGATION_CONTROLS:
+        return control
+    # The control can also be embedded in a longer instruction
+    for control in NAVIGATION_CONTROLS:
+        if control in instruction:
+            return control
+    raise ValueError(f"Unknown instruction: {instruction}")
+
+
+def is_action_block_closed(response: str) -> bool:
+    """Whether the code block holding the action has been fully generated"""
+    return response.count("```") >= 2 and bool(
+        CLOSED_CODE_BLOCK_PATTERN.search(response)
+    )
+
+
+def get_method_source(method: Callable) -> str:
+    return _get_function_source(getattr(method, "__func__", method))
+
+
+@lru_cache(maxsize=None)
+def _get_function_source(function: Callable) -> str:
+    # The source of a driver method never changes, avoid reading and parsing its file at each call
+    return inspect.getsource(function)
+
+
 def get_model_name(llm: BaseLLM) -> str:
-    try:
-        # Try accessing the 'model' attribute
-        return llm.model
-    except AttributeError:
-        try:
-            # Try accessing the 'model_name' attribute
-            return llm.model_name
-        except AttributeError:
-            return "Unknown"
+    return getattr(llm, "model", None) or getattr(llm, "model_name", "Unknown")
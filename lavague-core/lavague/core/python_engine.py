@@ -5,7 +5,6 @@ from typing import Callable, Optional
 from pathlib import Path
 
 from PIL import Image
-import trafilatura
 
 
 from lavague.core.context import Context, get_default_context
@@ -14,7 +13,6 @@ from lavague.core.base_driver import BaseDriver
 from lavague.core.logger import AgentLogger
 from lavague.core.base_engine import BaseEngine, ActionResult
 
-from llama_index.legacy.readers.file.base import SimpleDirectoryReader
 from llama_index.multi_modal_llms.openai import OpenAIMultiModal
 from llama_index.core import Document, VectorStoreIndex
 from llama_index.core.base.llms.base import BaseLLM
@@ -48,7 +46,7 @@ class PythonEngine(BaseEngine):
         llm: Optional[BaseLLM] = None,
         embedding: Optional[BaseEmbedding] = None,
         logger: Optional[AgentLogger] = None,
-        clean_html: Callable[[str], str] = trafilatura.extract,
+        clean_html: Optional[Callable[[str], str]] = None,
         ocr_mm_llm: Optional[BaseLLM] = None,
         ocr_llm: Optional[BaseLLM] = None,
         display: bool = False,
@@ -60,6 +58,11 @@ class PythonEngine(BaseEngine):
     ):
         self.llm = llm or get_default_context().extraction_llm
         self.embedding = embedding or get_default_context().embedding
+        if clean_html is None:
+            # trafilatura is slow to import, only load it when no cleaner is given
+            import trafilatura
+
+            clean_html = trafilatura.extract
         self.clean_html = clean_html
         self.driver = driver
         self.logger = logger
@@ -137,6 +140,8 @@ class PythonEngine(BaseEngine):
 
             screenshot_folder.mkdir(parents=True, exist_ok=True)
             self.get_screenshots_batch()
+            from llama_index.legacy.readers.file.base import SimpleDirectoryReader
+
             screenshots = SimpleDirectoryReader(screenshot_folder).load_data()
             output = self.ocr_mm_llm.complete(
                 image_documents=screenshots, prompt=prompt
@@ -1,5 +1,7 @@
 from IPython.display import display, clear_output
+from PIL import Image
 from PIL.PngImagePlugin import PngImageFile
+from typing import Optional, Tuple
 import base64
 import os
 
@@ -20,6 +22,25 @@ def encode_image(image_path):
         return base64.b64encode(image_file.read()).decode("utf-8")
 
 
+def screenshot_size(img: Image.Image, ratio: float) -> Tuple[int, int]:
+    return int(img.width / ratio), int(img.height / ratio)
+
+
+def resize_screenshot(
+    img: Image.Image, ratio: float, size: Optional[Tuple[int, int]] = None
+) -> Image.Image:
+    """Downscale a screenshot by `ratio`, `size` can be given to skip recomputing it for same-sized screenshots"""
+    if ratio == 1:
+        return img
+    # bilinear with a reducing gap is much cheaper than the default bicubic on large screenshots,
+    # and benefits from the SIMD kernels when Pillow-SIMD is installed in place of Pillow
+    return img.resize(
+        size or screenshot_size(img, ratio),
+        Image.Resampling.BILINEAR,
+        reducing_gap=2.0,
+    )
+
+
 def display_screenshot(img: PngImageFile):
     clear_output()
     if img.mode == "RGBA":
@@ -3,7 +3,6 @@ import os
 from abc import ABC
 from llama_index.core import PromptTemplate
 from llama_index.core.multi_modal_llms import MultiModalLLM
-from llama_index.legacy.readers.file.base import SimpleDirectoryReader
 from lavague.core.context import Context, get_default_context
 from lavague.core.logger import AgentLogger, Loggable
 from functools import lru_cache
@@ -420,6 +419,9 @@ class WorldModel(ABC, Loggable):
             raise Exception("Could not convert current state to YAML")
 
         screenshots_path: str = observations["screenshots_path"]
+        # The legacy readers are slow to import, only load them when they are used
+        from llama_index.legacy.readers.file.base import SimpleDirectoryReader
+
         image_documents = SimpleDirectoryReader(screenshots_path).load_data()
 
         prompt = self.prompt_template.format(
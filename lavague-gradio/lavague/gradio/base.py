@@ -2,6 +2,7 @@ from io import BytesIO
 import queue
 from typing import List, Optional
 from lavague.core.agents import WebAgent
+from lavague.core.utilities.web_utils import resize_screenshot
 import gradio as gr
 from PIL import Image
 
@@ -109,17 +110,8 @@ class GradioAgentDemo:
         return add_message
 
     def refresh_img_dislay(self, url, image_display):
-        img = self.agent.driver.get_screenshot_as_png()
-        img = BytesIO(img)
-        img = Image.open(img)
-        if self.screenshot_ratio != 1:
-            img = img.resize(
-                (
-                    int(img.width / self.screenshot_ratio),
-                    int(img.height / self.screenshot_ratio),
-                )
-            )
-        image_display = img
+        img = Image.open(BytesIO(self.agent.driver.get_screenshot_as_png()))
+        image_display = resize_screenshot(img, self.screenshot_ratio)
         return url, image_display
 
     def launch(self, server_port=7860, share=True, debug=True):
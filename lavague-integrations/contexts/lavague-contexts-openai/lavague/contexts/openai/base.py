@@ -16,6 +16,7 @@ class OpenaiContext(Context):
         llm: str = "gpt-4o",
         mm_llm: str = "gpt-4o",
         embedding: str = "text-embedding-3-large",
+        embed_batch_size: int = 512,
     ) -> Context:
         if api_key is None:
             api_key = os.getenv("OPENAI_API_KEY")
@@ -29,7 +30,9 @@ class OpenaiContext(Context):
                 temperature=DEFAULT_TEMPERATURE,
             ),
             OpenAIMultiModal(api_key=api_key, model=mm_llm),
-            OpenAIEmbedding(api_key=api_key, model=embedding),
+            OpenAIEmbedding(
+                api_key=api_key, model=embedding, embed_batch_size=embed_batch_size
+            ),
             OpenAI(
                 api_key=api_key,
                 model=llm,
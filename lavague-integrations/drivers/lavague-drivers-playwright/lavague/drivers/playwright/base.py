@@ -21,6 +21,8 @@ import time
 
 class PlaywrightDriver(BaseDriver):
     page: Page
+    # The Playwright sync API is bound to the thread that started it
+    thread_bound = True
 
     def __init__(
         self,
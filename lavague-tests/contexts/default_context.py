@@ -14,7 +14,7 @@ token_counter = TokenCounter()
 # init models
 llm = OpenAI(model=llm_name)
 mm_llm = OpenAIMultiModal(model=llm_name)
-embedding = OpenAIEmbedding(model=embedding_name)
+embedding = OpenAIEmbedding(model=embedding_name, embed_batch_size=512)
 
 # init context
 context = Context(llm, mm_llm, embedding)
@@ -0,0 +1,40 @@
+import copy
+import pickle
+import unittest
+from lavague.core.base_driver import BaseDriver
+
+
+# Every abstract method does nothing
+NoopDriver = type(
+    "NoopDriver",
+    (BaseDriver,),
+    {
+        "__module__": __name__,
+        **{
+            name: lambda self, *args, **kwargs: None
+            for name in BaseDriver.__abstractmethods__
+        },
+    },
+)
+
+
+def init_driver():
+    driver = None
+    return driver
+
+
+class TestBaseDriver(unittest.TestCase):
+    def test_command_lock(self):
+        driver = NoopDriver(None, init_driver)
+        self.assertIs(driver.command_lock, driver.command_lock)
+        # The lock is reentrant
+        with driver.command_lock, driver.command_lock:
+            pass
+
+        # Copies get their own lock
+        for driver_copy in (copy.deepcopy(driver), pickle.loads(pickle.dumps(driver))):
+            self.assertIsNot(driver_copy.command_lock, driver.command_lock)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,156 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from lavague.core.cache import PlanCache, ResponseCache, SemanticCache
+
+LOGIN_CONTEXT = '<button xpath="/html/body/button">Log in</button>'
+OTHER_CONTEXT = '<button xpath="/html/body/div/button">Log in</button>'
+
+
+class TestResponseCache(unittest.TestCase):
+    def test_get_and_set(self):
+        cache = ResponseCache()
+        self.assertIsNone(cache.get("Click on Submit"))
+        cache.set("Click on Submit", ("response", "action"))
+        self.assertEqual(cache.get("Click on Submit"), ("response", "action"))
+        cache.discard("Click on Submit")
+        self.assertIsNone(cache.get("Click on Submit"))
+
+    def test_lru_eviction(self):
+        cache = ResponseCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_disabled(self):
+        cache = ResponseCache(maxsize=0)
+        cache.set("a", 1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_ttl(self):
+        cache = ResponseCache(ttl=10)
+        with patch("lavague.core.cache.time.monotonic", return_value=0):
+            cache.set("a", 1)
+        with patch("lavague.core.cache.time.monotonic", return_value=5):
+            self.assertEqual(cache.get("a"), 1)
+        with patch("lavague.core.cache.time.monotonic", return_value=20):
+            self.assertIsNone(cache.get("a"))
+        cache.set("b", 2)
+        cache.cache_clear()
+        self.assertEqual(len(cache), 0)
+
+
+class TestSemanticCache(unittest.TestCase):
+    def setUp(self):
+        vectors = {
+            "click login": [1.0, 0.0],
+            "click log-in button": [0.99, 0.05],
+            "open settings": [0.0, 1.0],
+        }
+        self.embedding = MagicMock()
+        self.embedding.get_query_embedding.side_effect = lambda q: vectors[q]
+
+    def test_similar_query_same_context(self):
+        cache = SemanticCache(self.embedding)
+        cache.add("click login", LOGIN_CONTEXT, "code")
+        self.assertEqual(cache.get("click log-in button", LOGIN_CONTEXT), "code")
+        self.assertIsNone(cache.get("open settings", LOGIN_CONTEXT))
+        self.assertIsNone(cache.get("click login", OTHER_CONTEXT))
+        cache.discard("click login", LOGIN_CONTEXT)
+        self.assertEqual(len(cache), 0)
+
+    def test_persistence(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "semantic_cache.npz")
+            cache = SemanticCache(self.embedding, persist_path=path)
+            cache.add("click login", LOGIN_CONTEXT, "code")
+            # Entries are only written once the save interval is reached
+            self.assertFalse(os.path.exists(path))
+            cache.save()
+            cache = SemanticCache(self.embedding, persist_path=path)
+            self.assertEqual(cache.get("click login", LOGIN_CONTEXT), "code")
+
+    def test_persistence_empty(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "semantic_cache.npz")
+            SemanticCache(self.embedding, persist_path=path).save()
+            cache = SemanticCache(self.embedding, persist_path=path)
+            self.assertEqual(len(cache), 0)
+            cache.add("click login", LOGIN_CONTEXT, "code")
+            cache.cache_clear()
+            cache.save()
+            cache = SemanticCache(self.embedding, persist_path=path)
+            self.assertIsNone(cache.get("click login", LOGIN_CONTEXT))
+
+    def test_capacity(self):
+        cache = SemanticCache(self.embedding, capacity=2)
+        cache.add("click login", LOGIN_CONTEXT, "code")
+        cache.add("open settings", LOGIN_CONTEXT, "settings")
+        cache.add("open settings", OTHER_CONTEXT, "other settings")
+        # The oldest entry is dropped first
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("click login", LOGIN_CONTEXT))
+        self.assertEqual(cache.get("open settings", OTHER_CONTEXT), "other settings")
+        cache.discard("open settings", LOGIN_CONTEXT)
+        cache.add("click login", LOGIN_CONTEXT, "code")
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get("open settings", OTHER_CONTEXT), "other settings")
+
+    def test_typed_values(self):
+        vectors = {
+            "type john in the name field": [1.0, 0.0],
+            "type jane in the name field": [0.99, 0.05],
+            "write John in the name field": [0.98, 0.1],
+        }
+        self.embedding.get_query_embedding.side_effect = lambda q: vectors[q]
+        cache = SemanticCache(self.embedding)
+        action = '- actions:\n    - action:\n        args:\n          value: "john"'
+        cache.add("type john in the name field", LOGIN_CONTEXT, action)
+        self.assertIsNone(cache.get("type jane in the name field", LOGIN_CONTEXT))
+        self.assertEqual(
+            cache.get("write John in the name field", LOGIN_CONTEXT), action
+        )
+
+
+class TestPlanCache(unittest.TestCase):
+    action = """- actions:
+    - action:
+        args:
+            xpath: "/html/body/form/input"
+            value: "john@doe.com"
+        name: "setValueAndEnter"
+"""
+
+    def test_find_and_adapt(self):
+        cache = PlanCache(jsonl_file=None)
+        cache.add("Type john@doe.com in the email field", self.action, "url")
+        plan = cache.find("Type jane@doe.com in the email field", "url")
+        self.assertIsNotNone(plan)
+        self.assertIsNone(cache.find("Type jane@doe.com in the email field", "other"))
+        self.assertIsNone(cache.find("Click on the login button", "url"))
+
+        llm = MagicMock()
+        llm.complete.return_value.text = (
+            '```json\n{"applicable": true, "value_0": "jane@doe.com"}\n```'
+        )
+        action = cache.adapt(plan, "Type jane@doe.com in the email field", llm)
+        self.assertEqual(action, self.action.replace("john", "jane"))
+
+        llm.complete.return_value.text = '```json\n{"applicable": false}\n```'
+        self.assertIsNone(cache.adapt(plan, "Type in the name field", llm))
+
+    def test_unquoted_values(self):
+        for value in ("'john'", "john"):
+            action = self.action.replace('"john@doe.com"', value)
+            template, values = PlanCache.to_template(action)
+            self.assertEqual(values, ["john"])
+            self.assertNotIn("john", template)
+
+
+if __name__ == "__main__":
+    unittest.main()
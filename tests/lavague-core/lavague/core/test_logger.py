@@ -0,0 +1,54 @@
+import json
+import os
+import tempfile
+import unittest
+import numpy as np
+from PIL import Image
+from lavague.core.logger import LocalLogger
+
+
+class TestLocalLogger(unittest.TestCase):
+    def test_add_log(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logger = LocalLogger(os.path.join(tmpdir, "logs.jsonl"))
+            logger.new_run()
+            chunk = '<button xpath="/html/body/button">Log in</button>'
+            for _ in range(2):
+                logger.add_log(
+                    {
+                        "engine": "Navigation Engine",
+                        "engine_log": {
+                            "retrieved_html": [chunk],
+                            "vision_data": [{"screenshot": Image.new("RGB", (1, 1))}],
+                        },
+                        "html": "<html></html>",
+                    }
+                )
+
+            with open(logger.log_file_path) as f:
+                logs = [json.loads(line) for line in f]
+            self.assertEqual(len(logs), 2)
+            self.assertNotIn("html", logs[0])
+            engine_log = logs[0]["engine_log"]
+            self.assertIsNone(engine_log["vision_data"][0]["screenshot"])
+            reference = engine_log["retrieved_html"][0]
+            self.assertEqual(reference["len"], len(chunk))
+
+            # Each chunk is stored only once in the sidecar file
+            with open(logger.html_file_path) as f:
+                stored = [json.loads(line) for line in f]
+            self.assertEqual(stored, [{"hash": reference["hash"], "html": chunk}])
+
+    def test_numpy_scalar(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            logger = LocalLogger(os.path.join(tmpdir, "logs.jsonl"))
+            logger.new_run()
+            logger.add_log({"engine": "Navigation Engine", "t": np.float64(0.5)})
+
+            with open(logger.log_file_path) as f:
+                log = json.loads(f.readline())
+            self.assertEqual(log["t"], 0.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
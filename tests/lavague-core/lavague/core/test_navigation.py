@@ -0,0 +1,232 @@
+import asyncio
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+from PIL import Image
+from lavague.core.cache import SemanticCache
+from lavague.core.navigation import (
+    NavigationControl,
+    NavigationEngine,
+    get_navigation_control,
+)
+
+CONTEXT = '<button xpath="/html/body/button">Log in</button>'
+RESPONSE = """Let's click on the button
+```yaml
+- actions:
+    - action:
+        name: click
+        args:
+          xpath: /html/body/button
+```
+"""
+# The closing fence of RESPONSE is split across two deltas, followed by more text
+STREAM_DELTAS = [RESPONSE[:-4], "``", "`", "\nThen the rest of the answer"]
+
+
+class FakeDriver:
+    previously_scanned = False
+
+    def __init__(self, failing_exec: int = 0):
+        self.calls = []
+        self.failing_exec = failing_exec
+        self.command_lock = threading.RLock()
+
+    def get_cached_capability(self) -> str:
+        return "You are a web agent"
+
+    def get_html(self) -> str:
+        return f"<html><body>{CONTEXT}</body></html>"
+
+    def get_url(self) -> str:
+        return "https://example.com"
+
+    def get_highlighted_element(self, action: str) -> list:
+        return []
+
+    def exec_code(self, action: str):
+        self.calls.append(("exec_code", action))
+        if self.failing_exec > 0:
+            self.failing_exec -= 1
+            raise ValueError("Element is not clickable")
+
+    def scroll_down(self):
+        self.calls.append(("scroll_down",))
+
+    def switch_tab(self, tab_id: int):
+        self.calls.append(("switch_tab", tab_id))
+
+    def wait_for_idle(self):
+        pass
+
+
+def get_navigation_engine(driver: FakeDriver, **kwargs) -> NavigationEngine:
+    llm = MagicMock()
+    llm.complete.return_value.text = RESPONSE
+    retriever = MagicMock()
+    retriever.retrieve.return_value = [CONTEXT]
+    return NavigationEngine(
+        driver, llm=llm, retriever=retriever, time_between_actions=0, **kwargs
+    )
+
+
+class TestNavigationEngine(unittest.TestCase):
+    def test_response_cache(self):
+        driver = FakeDriver()
+        engine = get_navigation_engine(driver)
+
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(engine.llm.complete.call_count, 1)
+
+        # The successful response is reused for the same prompt
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(engine.llm.complete.call_count, 1)
+        self.assertEqual(len(driver.calls), 2)
+
+        # A cached action that fails is discarded and the retry asks the LLM again
+        driver.failing_exec = 1
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(engine.llm.complete.call_count, 2)
+        self.assertEqual(len(driver.calls), 4)
+
+    def test_get_action_not_cached(self):
+        driver = FakeDriver()
+        engine = get_navigation_engine(driver)
+
+        # Actions only generated are neither verified nor executed, they are not replayed
+        self.assertIn("/html/body/button", engine.get_action("Click on Log in"))
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(engine.llm.complete.call_count, 2)
+
+    def test_failing_semantic_cache(self):
+        embedding = MagicMock()
+        embedding.get_query_embedding.side_effect = ConnectionError("Embedding API")
+        driver = FakeDriver()
+        engine = get_navigation_engine(driver, semantic_cache=SemanticCache(embedding))
+
+        # Cache errors are misses on lookup and never turn the executed action into a retry
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(engine.llm.complete.call_count, 1)
+        self.assertEqual(len(driver.calls), 1)
+
+    def test_failing_plan_cache(self):
+        plan_cache = MagicMock()
+        plan_cache.find.return_value = None
+        plan_cache.add.side_effect = OSError("Read-only file system")
+        driver = FakeDriver()
+        engine = get_navigation_engine(driver, plan_cache=plan_cache)
+
+        self.assertTrue(engine.execute_instruction("Click on Log in").success)
+        self.assertEqual(len(driver.calls), 1)
+        plan_cache.add.assert_called_once()
+
+    def test_aexecute_instruction(self):
+        driver = FakeDriver(failing_exec=1)
+        engine = get_navigation_engine(driver)
+        engine.llm.acomplete = AsyncMock(return_value=MagicMock(text=RESPONSE))
+
+        # The first execution fails and is retried
+        result = asyncio.run(engine.aexecute_instruction("Click on Log in"))
+        self.assertTrue(result.success)
+        self.assertEqual(engine.llm.acomplete.await_count, 2)
+        self.assertEqual(len(driver.calls), 2)
+        engine.llm.complete.assert_not_called()
+
+        # The successful response is then served from the cache
+        result = asyncio.run(engine.aexecute_instruction("Click on Log in"))
+        self.assertTrue(result.success)
+        self.assertEqual(engine.llm.acomplete.await_count, 2)
+        self.assertEqual(len(driver.calls), 3)
+        engine.close()
+        self.assertIsNone(engine._driver_executor)
+
+    def test_aexecute_instruction_thread_bound(self):
+        driver = FakeDriver()
+        driver.thread_bound = True
+        engine = get_navigation_engine(driver)
+        with self.assertRaises(ValueError):
+            asyncio.run(engine.aexecute_instruction("Click on Log in"))
+        self.assertEqual(driver.calls, [])
+
+    def test_stream_response(self):
+        engine = get_navigation_engine(FakeDriver(), stream_response=True)
+        consumed = []
+        closed = []
+
+        def stream_complete(prompt):
+            try:
+                for delta in STREAM_DELTAS:
+                    consumed.append(delta)
+                    yield MagicMock(delta=delta)
+            finally:
+                closed.append(True)
+
+        engine.llm.stream_complete = stream_complete
+        self.assertEqual(engine._complete("prompt"), RESPONSE.rstrip())
+        # The stream is closed as soon as the code block is
+        self.assertEqual(consumed, STREAM_DELTAS[:3])
+        self.assertEqual(closed, [True])
+        engine.llm.complete.assert_not_called()
+
+    def test_astream_response(self):
+        engine = get_navigation_engine(FakeDriver(), stream_response=True)
+        consumed = []
+        closed = []
+
+        async def stream():
+            try:
+                for delta in STREAM_DELTAS:
+                    consumed.append(delta)
+                    yield MagicMock(delta=delta)
+            finally:
+                closed.append(True)
+
+        engine.llm.astream_complete = AsyncMock(side_effect=lambda prompt: stream())
+        self.assertEqual(asyncio.run(engine._acomplete("prompt")), RESPONSE.rstrip())
+        self.assertEqual(consumed, STREAM_DELTAS[:3])
+        self.assertEqual(closed, [True])
+        engine.llm.acomplete.assert_not_called()
+
+    def test_display_screenshots(self):
+        with tempfile.TemporaryDirectory() as tmpdir:
+            for i in range(3):
+                Image.new("RGB", (1920, 1080)).save(f"{tmpdir}/{i}.png")
+            driver = FakeDriver()
+            driver.get_current_screenshot_folder = lambda: Path(tmpdir)
+            engine = get_navigation_engine(driver)
+
+            with patch("lavague.core.navigation.display_screenshot") as display:
+                engine._display_screenshots()
+                # Screenshots are displayed in a grid of 2 columns
+                self.assertEqual(display.call_args[0][0].size, (1920, 1080))
+                # Screenshots already displayed for the instruction are skipped
+                engine._display_screenshots()
+                self.assertEqual(display.call_count, 1)
+                engine._reset_displayed_screenshots()
+                engine._display_screenshots()
+                self.assertEqual(display.call_count, 2)
+
+
+class TestNavigationControl(unittest.TestCase):
+    def test_get_navigation_control(self):
+        self.assertEqual(get_navigation_control("SWITCH_TAB 2"), "SWITCH_TAB")
+        self.assertEqual(get_navigation_control("Please SCROLL_UP"), "SCROLL_UP")
+        with self.assertRaises(ValueError):
+            get_navigation_control("JUMP")
+
+    def test_execute_instruction(self):
+        driver = FakeDriver()
+        control = NavigationControl(driver, logger=MagicMock())
+
+        result = control.execute_instruction("SCROLL_DOWN")
+        self.assertTrue(result.success)
+        self.assertIn("def scroll_down", result.code)
+
+        control.execute_instruction("SWITCH_TAB 1")
+        self.assertEqual(driver.calls, [("scroll_down",), ("switch_tab", 1)])
+
+
+if __name__ == "__main__":
+    unittest.main()
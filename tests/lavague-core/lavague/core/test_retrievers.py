@@ -0,0 +1,62 @@
+import unittest
+from unittest.mock import MagicMock
+import numpy as np
+from llama_index.core import QueryBundle
+from lavague.core.retrievers import (
+    SemanticRetriever,
+    normalize_embeddings,
+    quantize_embeddings,
+    top_k_similarities,
+)
+
+
+class TestSemanticRetriever(unittest.TestCase):
+    def test_top_k_similarities(self):
+        embeddings = normalize_embeddings([[1, 0], [0, 1], [1, 1], [-1, 0]])
+        query = normalize_embeddings([[1, 0.1]])[0]
+        self.assertEqual(top_k_similarities(embeddings, query, 2).tolist(), [0, 2])
+        self.assertEqual(
+            top_k_similarities(embeddings, query, 10).tolist(), [0, 2, 1, 3]
+        )
+
+    def test_quantized_top_k_similarities(self):
+        rng = np.random.default_rng(0)
+        embeddings = normalize_embeddings(rng.normal(size=(50, 64)))
+        query = normalize_embeddings(rng.normal(size=(1, 64)))
+        quantized, scales = quantize_embeddings(embeddings)
+        self.assertEqual(quantized.dtype, np.int8)
+        self.assertEqual(
+            top_k_similarities(
+                quantized, quantize_embeddings(query)[0][0], 3, scales
+            ).tolist(),
+            top_k_similarities(embeddings, query[0], 3).tolist(),
+        )
+
+    def test_retrieve(self):
+        for quantize in (False, True):
+            with self.subTest(quantize=quantize):
+                self._test_retrieve(quantize)
+
+    def _test_retrieve(self, quantize: bool):
+        embedding = MagicMock()
+        embedding.get_text_embedding_batch.side_effect = lambda texts, **_: [
+            [1.0, 0.0] if "Log in" in text else [0.0, 1.0] for text in texts
+        ]
+        embedding.get_agg_embedding_from_queries.return_value = [1.0, 0.2]
+        retriever = SemanticRetriever(embedding=embedding, top_k=1, quantize=quantize)
+        html_chunks = [
+            '<button xpath="/html/body/button">Log in</button>',
+            '<a xpath="/html/body/a">' + "Pricing " * 1000 + "</a>",
+        ]
+
+        results = retriever.retrieve(QueryBundle("Log in"), html_chunks)
+        self.assertEqual(len(results), 1)
+        self.assertIn("Log in", results[0])
+
+        # The chunks are only embedded once while the html does not change
+        retriever.retrieve(QueryBundle("Log in"), html_chunks)
+        embedding.get_text_embedding_batch.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()